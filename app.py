@@ -1,154 +1,326 @@
 import os
+import re
+import math
 import logging
+import threading
+import json
+import faiss
+import numpy as np
+from collections import OrderedDict
+from numba import njit, prange
 import streamlit as st
-from pathlib import Path
 from datetime import datetime
-from llama_index.core import VectorStoreIndex, Settings, StorageContext
-from llama_index.core.schema import Document
-from llama_index.embeddings.huggingface import HuggingFaceEmbedding
-import nltk
 
-# Set the NLTK data path
-nltk_data_path = os.path.join(os.path.dirname(__file__), 'nltk_data')
-nltk.data.path.append(nltk_data_path)
+from knowledge_base import (
+    HEALTH_DOCUMENTS, INDEX_DIR, VECTORS_FILE, TEXTS_FILE, FAISS_FILE,
+    embed_documents, save_vectors, load_vectors
+)
 
 # ========== INITIALIZATION ==========
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Initialize embeddings
-Settings.embed_model = HuggingFaceEmbedding(
-    model_name="BAAI/bge-small-en-v1.5"
-)
+# Shared embedding server (embed_server.py); unset to run the model in-process
+EMBED_SERVER_URL = os.environ.get("EMBED_SERVER_URL")
+
+# Initialize embeddings (INT8-quantized ONNX BGE model), loaded once per process
+@st.cache_resource
+def get_embed_model():
+    # Imported here: known conditions never embed, so startup skips
+    # onnxruntime / transformers / llama-index entirely
+    if EMBED_SERVER_URL:
+        from remote_embedding import RemoteEmbedding
+        return RemoteEmbedding(url=EMBED_SERVER_URL)
+    from onnx_embedding import OnnxBGEEmbedding
+    return OnnxBGEEmbedding(
+        model_name="BAAI/bge-small-en-v1.5"
+    )
+
+# ========== HEALTH INDEX ==========
+# HNSW graph parameters
+HNSW_M = 32
+HNSW_EF_CONSTRUCTION = 64
+HNSW_EF_SEARCH = 64
+VECTOR_QUANTIZER = faiss.ScalarQuantizer.QT_8bit
+
+def build_faiss_index(vectors):
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    # int8 scalar-quantized storage; FAISS scores codes with SIMD kernels
+    index = faiss.IndexHNSWSQ(vectors.shape[1], VECTOR_QUANTIZER, HNSW_M)
+    index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+    index.train(vectors)
+    index.add(vectors)
+    return index
+
+class KnowledgeBaseError(Exception):
+    pass
 
- # ========== HEALTH KNOWLEDGE BASE ==========
 def initialize_health_index():
     try:
-        index_path = Path("health_index")
-        index_path.mkdir(exist_ok=True)
+        INDEX_DIR.mkdir(exist_ok=True)
         
-        if (index_path / "docstore.json").exists():
-            storage_context = StorageContext.from_defaults(persist_dir=index_path)
-            return VectorStoreIndex.from_documents(
-                documents=[],
-                storage_context=storage_context
-            )
+        if FAISS_FILE.exists() and TEXTS_FILE.exists():
+            index = faiss.read_index(str(FAISS_FILE))
+            index.hnsw.efSearch = HNSW_EF_SEARCH
+            with open(TEXTS_FILE) as f:
+                texts = json.load(f)
+            return index, texts
         
-        # Create health knowledge base with improved structure
-        documents = [
-            Document(text="""Condition: Hypertension | High Blood Pressure
-                Diagnostic Criteria: BP > 140/90 mmHg
-                Recommendations:
-                - Sodium restriction <1500mg/day
-                - Potassium-rich foods: bananas, spinach, sweet potatoes
-                - Whole grains and lean proteins
-                - Limit alcohol/caffeine"""),
-            
-            Document(text="""Condition: Diabetes | High Blood Sugar
-                Diagnostic Criteria: Fasting glucose > 126 mg/dL
-                Recommendations:
-                - Low glycemic index foods
-                - Balanced carbohydrate distribution
-                - High fiber intake
-                - Healthy fats: avocado, nuts"""),
-                
-            Document(text="""Condition: Hyperlipidemia | High Cholesterol
-                Diagnostic Criteria: LDL > 130 mg/dL
-                Recommendations:
-                - Reduce saturated fats
-                - Omega-3 sources: fish, flaxseeds
-                - Soluble fiber: oats, beans
-                - Plant sterols/stanols"""),
-                
-            Document(text="""Condition: Weight Management
-                Diagnostic Criteria: BMI > 25
-                Recommendations:
-                - Calorie deficit: 500-750 kcal/day
-                - High protein intake
-                - Portion control
-                - Regular exercise""")
-        ]
-        index = VectorStoreIndex.from_documents(documents)
-        index.storage_context.persist(persist_dir=index_path)
-        return index
+        # Prefer embeddings shipped by scripts/build_index.py; embed on the fly otherwise
+        if VECTORS_FILE.exists() and TEXTS_FILE.exists():
+            vectors, texts = load_vectors()
+        else:
+            texts = list(HEALTH_DOCUMENTS)
+            vectors = embed_documents(get_embed_model(), texts)
+            save_vectors(vectors, texts)
+        
+        index = build_faiss_index(vectors)
+        index.hnsw.efSearch = HNSW_EF_SEARCH
+        faiss.write_index(index, str(FAISS_FILE))
+        return index, texts
     except Exception as e:
         logger.error(f"Index initialization error: {str(e)}")
-        st.error("Failed to load health knowledge base")
+        # Raise rather than return None so st.cache_resource does not cache the failure
+        raise KnowledgeBaseError("Failed to load health knowledge base") from e
+
+def embed_query(query):
+    qvec = np.asarray(get_embed_model().get_query_embedding(query), dtype=np.float32)
+    return qvec / np.linalg.norm(qvec)
+
+def search_index(health_index, qvec, k=2):
+    index, texts = health_index
+    _, ids = index.search(qvec.reshape(1, -1), min(k, index.ntotal))
+    return [texts[i] for i in ids[0] if i >= 0]
+
+# Loaded on first use: known conditions never touch the index (see get_context)
+@st.cache_resource
+def get_index():
+    return initialize_health_index()
+
+# ========== QUERY CACHE ==========
+class SemanticQueryCache:
+    """Approximate query cache: random-projection LSH over normalized query embeddings."""
+
+    def __init__(self, dim, n_planes=16, threshold=0.95, max_per_bucket=8, max_entries=1024, seed=0):
+        rng = np.random.default_rng(seed)
+        self.planes = rng.standard_normal((n_planes, dim)).astype(np.float32)
+        self.threshold = threshold
+        self.max_per_bucket = max_per_bucket
+        self.max_entries = max_entries
+        # Buckets in insertion order, so the oldest is evicted first
+        self.buckets = OrderedDict()
+        self.size = 0
+        self.lock = threading.Lock()
+
+    def _bucket(self, qvec):
+        return np.packbits(self.planes @ qvec > 0).tobytes()
+
+    def get(self, qvec):
+        with self.lock:
+            entries = list(self.buckets.get(self._bucket(qvec), []))
+        for cached_vec, context in entries:
+            if float(cached_vec @ qvec) >= self.threshold:
+                return context
         return None
 
-health_index = initialize_health_index()
+    def put(self, qvec, context):
+        key = self._bucket(qvec)
+        with self.lock:
+            entries = self.buckets.pop(key, [])
+            # Normalized embeddings keep their cosine scores when stored as fp16
+            entries.append((qvec.astype(np.float16), context))
+            kept = entries[-self.max_per_bucket:]
+            self.size += len(kept) - len(entries) + 1
+            self.buckets[key] = kept
+            while self.size > self.max_entries:
+                _, evicted = self.buckets.popitem(last=False)
+                self.size -= len(evicted)
+
+@st.cache_resource
+def get_query_cache(dim):
+    return SemanticQueryCache(dim)
+
+# Conditions from analyze_health that map directly onto a KB document
+# (None: no condition-specific guidance, use the base recommendations)
+_CONDITION_TO_DOC = {
+    "Hypertension": HEALTH_DOCUMENTS[0],
+    "High Blood Sugar": HEALTH_DOCUMENTS[1],
+    "High Cholesterol": HEALTH_DOCUMENTS[2],
+    "Overweight": HEALTH_DOCUMENTS[3],
+    "Obese": HEALTH_DOCUMENTS[3],
+    "Underweight": None,
+    "Normal weight": None
+}
+
+# Shared across reruns and sessions. _query (the text embedded on a miss) is
+# excluded from the cache key, which is the sorted conditions tuple
+@st.cache_data(max_entries=256, show_spinner=False)
+def get_context(conditions_key, _query):
+    """Knowledge-base context for a sorted tuple of conditions."""
+    # Known conditions resolve by table lookup; vector search is the fallback
+    if all(c in _CONDITION_TO_DOC for c in conditions_key):
+        docs = dict.fromkeys(_CONDITION_TO_DOC[c] for c in conditions_key)
+        return "\n".join(doc for doc in docs if doc)
+    
+    qvec = embed_query(_query)
+    query_cache = get_query_cache(qvec.shape[0])
+    context = query_cache.get(qvec)
+    if context is None:
+        context = "\n".join(search_index(get_index(), qvec, k=2))
+        query_cache.put(qvec, context)
+    return context
 
 # ========== HEALTH CALCULATIONS ==========
-def calculate_bmi(weight, height):
-    return weight / ((height/100) ** 2)
+_BP_RE = re.compile(r"^\s*(\d{1,3})\s*/\s*(\d{1,3})\s*$")
 
-def analyze_health(age, weight, height, bp, sugar, cholesterol):
-    results = {
-        "bmi": round(calculate_bmi(weight, height), 1),
-        "conditions": [],
-        "age": age
-    }
+# Condition bits returned by _analyze_core, in display order
+UNDERWEIGHT = 1
+NORMAL_WEIGHT = 2
+OVERWEIGHT = 4
+OBESE = 8
+HYPERTENSION = 16
+HIGH_BLOOD_SUGAR = 32
+HIGH_CHOLESTEROL = 64
+
+CONDITION_LABELS = [
+    (UNDERWEIGHT, "Underweight"),
+    (NORMAL_WEIGHT, "Normal weight"),
+    (OVERWEIGHT, "Overweight"),
+    (OBESE, "Obese"),
+    (HYPERTENSION, "Hypertension"),
+    (HIGH_BLOOD_SUGAR, "High Blood Sugar"),
+    (HIGH_CHOLESTEROL, "High Cholesterol")
+]
+
+def _round_up_cutoff(limit):
+    # Smallest float x with round(x, 1) >= limit. numba's round() differs from
+    # CPython's near .x5 ties, so the core compares the raw BMI against these
+    x = limit - 0.05
+    while round(x, 1) >= limit:
+        x = math.nextafter(x, -math.inf)
+    while round(x, 1) < limit:
+        x = math.nextafter(x, math.inf)
+    return x
+
+# BMI band limits, applied to the BMI as rounded by Python's round(bmi, 1)
+_BMI_NORMAL_CUTOFF = _round_up_cutoff(18.5)
+_BMI_OVERWEIGHT_CUTOFF = _round_up_cutoff(25)
+_BMI_OBESE_CUTOFF = _round_up_cutoff(30)
+
+def conditions_from_mask(mask):
+    return [label for bit, label in CONDITION_LABELS if mask & bit]
+
+@njit(cache=True)
+def _analyze_core(weight, height, systolic, diastolic, sugar, cholesterol):
+    # Raw BMI; callers round it with Python's round() for display
+    bmi = weight / ((height / 100.0) ** 2)
     
     # BMI Classification
-    if results["bmi"] < 18.5:
-        results["conditions"].append("Underweight")
-    elif 18.5 <= results["bmi"] < 25:
-        results["conditions"].append("Normal weight")
-    elif 25 <= results["bmi"] < 30:
-        results["conditions"].append("Overweight")
+    if bmi < _BMI_NORMAL_CUTOFF:
+        mask = UNDERWEIGHT
+    elif bmi < _BMI_OVERWEIGHT_CUTOFF:
+        mask = NORMAL_WEIGHT
+    elif bmi < _BMI_OBESE_CUTOFF:
+        mask = OVERWEIGHT
     else:
-        results["conditions"].append("Obese")
+        mask = OBESE
     
     # Blood Pressure Analysis
-    try:
-        systolic, diastolic = map(int, bp.split('/'))
-        if systolic >= 140 or diastolic >= 90:
-            results["conditions"].append("Hypertension")
-    except:
-        st.error("Invalid blood pressure format. Use systolic/diastolic (e.g., 120/80)")
+    if systolic >= 140 or diastolic >= 90:
+        mask |= HYPERTENSION
     
- 
     # Blood Sugar Analysis
     if sugar >= 126:
-        results["conditions"].append("High Blood Sugar")
+        mask |= HIGH_BLOOD_SUGAR
     
     # Cholesterol Analysis
     if cholesterol >= 200:
-        results["conditions"].append("High Cholesterol")
+        mask |= HIGH_CHOLESTEROL
     
-    return results
+    return bmi, np.uint8(mask)
+
+@njit(parallel=True, cache=True)
+def _analyze_core_batch(rows):
+    n = rows.shape[0]
+    bmis = np.empty(n, dtype=np.float64)
+    masks = np.empty(n, dtype=np.uint8)
+    for i in prange(n):
+        bmi, mask = _analyze_core(rows[i, 0], rows[i, 1], rows[i, 2], rows[i, 3], rows[i, 4], rows[i, 5])
+        bmis[i] = bmi
+        masks[i] = mask
+    return bmis, masks
+
+def analyze_health_batch(rows):
+    """Score many patients at once.
+
+    rows is an (N, 6) array of weight, height, systolic, diastolic, sugar and
+    cholesterol. Returns the BMIs (rounded as in analyze_health) and a uint8
+    condition bitmask per row; conditions_from_mask decodes a mask.
+    """
+    bmis, masks = _analyze_core_batch(np.ascontiguousarray(rows, dtype=np.float64))
+    return np.array([round(bmi, 1) for bmi in bmis.tolist()], dtype=np.float64), masks
+
+def analyze_health(age, weight, height, bp, sugar, cholesterol):
+    m = _BP_RE.match(bp)
+    if m:
+        systolic, diastolic = float(m.group(1)), float(m.group(2))
+    else:
+        systolic = diastolic = 0.0
+        st.error("Invalid blood pressure format. Use systolic/diastolic (e.g., 120/80)")
+    
+    bmi, mask = _analyze_core(
+        float(weight), float(height), systolic, diastolic, float(sugar), float(cholesterol)
+    )
+    return {
+        "bmi": round(bmi, 1),
+        "conditions": conditions_from_mask(mask),
+        "age": age
+    }
 
 # ========== DIET GENERATION ==========
+# Whitespace other than newline, so a match never spans lines; mirrors str.strip()
+_BULLET_RE = re.compile(r"^[^\S\n]*- ([^\S\n]*\S.*?)[^\S\n]*$", re.M)
+
+# Base recommendations
+_BASE_RECOMMENDATIONS = [
+    "Balanced nutrition with variety of foods",
+    "Stay hydrated (8 glasses of water daily)",
+    "Regular meal timings"
+]
+
+# Meal plan template
+_MEAL_PLAN = {
+    "Breakfast": "Whole grain cereal with fruits and nuts",
+    "Morning Snack": "Greek yogurt or fresh fruit",
+    "Lunch": "Grilled protein with vegetables and quinoa",
+    "Afternoon Snack": "Vegetable sticks with hummus",
+    "Dinner": "High-fiber meal with lean protein and salad"
+}
+
+# Static sections, rendered once at import
+_BASE_RECOMMENDATIONS_MD = "\n".join(f"- {rec}" for rec in _BASE_RECOMMENDATIONS)
+_MEAL_PLAN_MD = "\n".join(f"**{meal}:** {details}" for meal, details in _MEAL_PLAN.items())
+_LIFESTYLE_MD = """- Engage in 30 minutes of moderate exercise daily
+- Practice stress-reduction techniques
+- Get 7-8 hours of quality sleep
+- Regular health checkups"""
+_FOOTER_MD = "*Based on analysis of your health metrics and medical guidelines*"
+
 def generate_diet_plan(health_data, context):
     try:
-        # Base recommendations
-        recommendations = [
-            "Balanced nutrition with variety of foods",
-            "Stay hydrated (8 glasses of water daily)",
-            "Regular meal timings"
-        ]
+        recommendations_md = _BASE_RECOMMENDATIONS_MD
         
         # Process context from knowledge base
         if context:
             try:
-                context_recommendations = []
-                for line in context.split('\n'):
-                    if line.strip().startswith("- "):
-                        context_recommendations.append(line.strip())
+                context_recommendations = [
+                    "- " + m.group(1) for m in _BULLET_RE.finditer(context)
+                ]
                 if context_recommendations:
-                    recommendations = context_recommendations
+                    recommendations_md = "\n".join(f"- {rec}" for rec in context_recommendations)
             except Exception as e:
                 logger.error(f"Context processing error: {str(e)}")
         
-        # Create meal plan template
-        meal_plan = {
-            "Breakfast": "Whole grain cereal with fruits and nuts",
-            "Morning Snack": "Greek yogurt or fresh fruit",
-            "Lunch": "Grilled protein with vegetables and quinoa",
-            "Afternoon Snack": "Vegetable sticks with hummus",
-            "Dinner": "High-fiber meal with lean protein and salad"
-        }
-        
         # Format output
         return f"""
 ## Personalized Diet Plan for {health_data['age']} Year Old
@@ -158,54 +330,38 @@ def generate_diet_plan(health_data, context):
 - **Identified Conditions:** {', '.join(health_data['conditions'])}
 
 ### Dietary Recommendations:
-{'\n'.join([f'- {rec}' for rec in recommendations])}
+{recommendations_md}
 
 ### Sample Daily Meal Plan:
-{'\n'.join([f'**{meal}:** {details}' for meal, details in meal_plan.items()])}
+{_MEAL_PLAN_MD}
 
 ### Lifestyle Advice:
-- Engage in 30 minutes of moderate exercise daily
-- Practice stress-reduction techniques
-- Get 7-8 hours of quality sleep
-- Regular health checkups
+{_LIFESTYLE_MD}
 
-*Based on analysis of your health metrics and medical guidelines*
+{_FOOTER_MD}
 """
     except Exception as e:
         logger.error(f"Generation error: {str(e)}")
         return None
 
 # ========== MAIN INTERFACE ==========
-def main():
-    st.title("AI-Powered Health Advisor 🩺")
-    
-    # Input Section
-    with st.expander("Enter Your Health Metrics", expanded=True):
-        col1, col2 = st.columns(2)
-        with col1:
-            age = st.number_input("Age", min_value=18, max_value=100, value=30)
-            weight = st.number_input("Weight (kg)", min_value=30, value=70)
-            height = st.number_input("Height (cm)", min_value=100, value=170)
-        with col2:
-            bp = st.text_input("Blood Pressure (e.g., 120/80)", value="120/80")
-            sugar = st.number_input("Fasting Blood Sugar (mg/dL)", min_value=50, value=100)
-            cholesterol = st.number_input("Total Cholesterol (mg/dL)", min_value=100, value=180)
-    
+_DISCLAIMER_MD = """
+    ---
+    **Disclaimer:** This AI system provides general health information and should not be used as a substitute for professional medical advice. Always consult a qualified healthcare provider before making any changes to your diet or lifestyle.
+    """
+
+# Reruns on its own when its widgets change, without re-executing the whole page
+@st.fragment
+def _run_analysis(age, weight, height, bp, sugar, cholesterol):
     if st.button("Generate Personalized Diet Plan", type="primary"):
-        if not health_index:
-            st.error("Health knowledge base not loaded. Please restart the app.")
-            return
-            
         with st.spinner("Analyzing your health profile and generating recommendations..."):
             try:
                 # Health analysis
                 health_data = analyze_health(age, weight, height, bp, sugar, cholesterol)
                 
                 # Retrieve medical context
-                retriever = health_index.as_retriever(similarity_top_k=2)
-                query = " ".join(health_data['conditions'])
-                retrieved_nodes = retriever.retrieve(query)
-                context = "\n".join([n.node.text for n in retrieved_nodes])
+                conditions = health_data['conditions']
+                context = get_context(tuple(sorted(conditions)), " ".join(conditions))
                 
                 # Generate diet plan
                 diet_plan = generate_diet_plan(health_data, context)
@@ -224,15 +380,31 @@ def main():
                 else:
                     st.error("Failed to generate plan. Please try again.")
                     
+            except KnowledgeBaseError:
+                st.error("Health knowledge base not loaded. Please restart the app.")
             except Exception as e:
                 logger.error(f"System error: {str(e)}")
                 st.error("Failed to generate plan. Please check your inputs and try again.")
 
+def main():
+    st.title("AI-Powered Health Advisor 🩺")
+    
+    # Input Section
+    with st.expander("Enter Your Health Metrics", expanded=True):
+        col1, col2 = st.columns(2)
+        with col1:
+            age = st.number_input("Age", min_value=18, max_value=100, value=30)
+            weight = st.number_input("Weight (kg)", min_value=30, value=70)
+            height = st.number_input("Height (cm)", min_value=100, value=170)
+        with col2:
+            bp = st.text_input("Blood Pressure (e.g., 120/80)", value="120/80")
+            sugar = st.number_input("Fasting Blood Sugar (mg/dL)", min_value=50, value=100)
+            cholesterol = st.number_input("Total Cholesterol (mg/dL)", min_value=100, value=180)
+    
+    _run_analysis(age, weight, height, bp, sugar, cholesterol)
+
     # Disclaimer
-    st.markdown("""
-    ---
-    **Disclaimer:** This AI system provides general health information and should not be used as a substitute for professional medical advice. Always consult a qualified healthcare provider before making any changes to your diet or lifestyle.
-    """)
+    st.markdown(_DISCLAIMER_MD)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
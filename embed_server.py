@@ -0,0 +1,83 @@
+"""Embedding sidecar: one INT8 ONNX BGE model shared by every app session.
+
+Run with a single worker so the model is loaded once:
+    uvicorn embed_server:app --workers 1 --port 8001
+
+and point the app at it:
+    EMBED_SERVER_URL=http://127.0.0.1:8001/embed streamlit run app.py
+"""
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import List
+
+from fastapi import FastAPI
+from pydantic import BaseModel
+
+from onnx_embedding import OnnxBGEEmbedding
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Pending requests merged into a single forward pass
+MAX_BATCH_REQUESTS = 8
+
+
+class EmbedRequest(BaseModel):
+    texts: List[str]
+
+
+class EmbedResponse(BaseModel):
+    embeddings: List[List[float]]
+
+
+def resolve(future, result=None, error=None):
+    # The handler's future is cancelled if its client disconnects
+    if future.done():
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+
+
+async def batch_worker(embed_model, queue):
+    while True:
+        batch = [await queue.get()]
+        while len(batch) < MAX_BATCH_REQUESTS and not queue.empty():
+            batch.append(queue.get_nowait())
+
+        # Never let one bad batch end the only worker task
+        try:
+            texts = [text for request_texts, _ in batch for text in request_texts]
+            vectors = await asyncio.to_thread(embed_model.get_text_embedding_batch, texts)
+
+            start = 0
+            for request_texts, future in batch:
+                resolve(future, result=vectors[start:start + len(request_texts)])
+                start += len(request_texts)
+        except Exception as e:
+            logger.error(f"Embedding error: {str(e)}")
+            for _, future in batch:
+                resolve(future, error=e)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    embed_model = OnnxBGEEmbedding(embed_batch_size=256)
+    app.state.queue = asyncio.Queue()
+    worker = asyncio.create_task(batch_worker(embed_model, app.state.queue))
+    yield
+    worker.cancel()
+
+
+app = FastAPI(lifespan=lifespan)
+
+
+@app.post("/embed", response_model=EmbedResponse)
+async def embed(request: EmbedRequest):
+    if not request.texts:
+        return EmbedResponse(embeddings=[])
+    future = asyncio.get_running_loop().create_future()
+    await app.state.queue.put((request.texts, future))
+    return EmbedResponse(embeddings=await future)
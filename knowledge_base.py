@@ -0,0 +1,64 @@
+import json
+from pathlib import Path
+
+import numpy as np
+
+# ========== HEALTH KNOWLEDGE BASE ==========
+# Create health knowledge base with improved structure
+HEALTH_DOCUMENTS = [
+    """Condition: Hypertension | High Blood Pressure
+                Diagnostic Criteria: BP > 140/90 mmHg
+                Recommendations:
+                - Sodium restriction <1500mg/day
+                - Potassium-rich foods: bananas, spinach, sweet potatoes
+                - Whole grains and lean proteins
+                - Limit alcohol/caffeine""",
+
+    """Condition: Diabetes | High Blood Sugar
+                Diagnostic Criteria: Fasting glucose > 126 mg/dL
+                Recommendations:
+                - Low glycemic index foods
+                - Balanced carbohydrate distribution
+                - High fiber intake
+                - Healthy fats: avocado, nuts""",
+
+    """Condition: Hyperlipidemia | High Cholesterol
+                Diagnostic Criteria: LDL > 130 mg/dL
+                Recommendations:
+                - Reduce saturated fats
+                - Omega-3 sources: fish, flaxseeds
+                - Soluble fiber: oats, beans
+                - Plant sterols/stanols""",
+
+    """Condition: Weight Management
+                Diagnostic Criteria: BMI > 25
+                Recommendations:
+                - Calorie deficit: 500-750 kcal/day
+                - High protein intake
+                - Portion control
+                - Regular exercise"""
+]
+
+INDEX_DIR = Path(__file__).resolve().parent / "health_index"
+VECTORS_FILE = INDEX_DIR / "vectors.npy"
+TEXTS_FILE = INDEX_DIR / "texts.json"
+FAISS_FILE = INDEX_DIR / "faiss.idx"
+
+# ========== PRECOMPUTED EMBEDDINGS ==========
+def embed_documents(embed_model, texts):
+    vectors = np.asarray(embed_model.get_text_embedding_batch(list(texts)), dtype=np.float32)
+    # Normalize before casting so cosine semantics survive the fp16 round-trip
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors.astype(np.float16)
+
+def save_vectors(vectors, texts):
+    INDEX_DIR.mkdir(exist_ok=True)
+    np.save(VECTORS_FILE, vectors)
+    with open(TEXTS_FILE, "w") as f:
+        json.dump(list(texts), f)
+
+def load_vectors():
+    vectors = np.load(VECTORS_FILE, mmap_mode="r")
+    with open(TEXTS_FILE) as f:
+        texts = json.load(f)
+    return vectors, texts
@@ -0,0 +1,110 @@
+import logging
+import os
+from pathlib import Path
+
+import numpy as np
+import onnxruntime as ort
+from llama_index.core.bridge.pydantic import Field, PrivateAttr
+from llama_index.core.embeddings import BaseEmbedding
+from transformers import AutoTokenizer
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL_NAME = "BAAI/bge-small-en-v1.5"
+DEFAULT_MODEL_DIR = Path(__file__).resolve().parent / "models" / "bge-small-en-v1.5-int8"
+QUANTIZED_MODEL_FILE = "model_quantized.onnx"
+# Same query instruction HuggingFaceEmbedding applies for English BGE models
+BGE_QUERY_INSTRUCTION = "Represent this question for searching relevant passages: "
+
+
+# ========== MODEL EXPORT ==========
+def export_quantized_model(model_name=DEFAULT_MODEL_NAME, output_dir=DEFAULT_MODEL_DIR):
+    """Export the encoder to ONNX and apply dynamic INT8 quantization.
+
+    Runs once; later calls reuse the quantized model already on disk.
+    """
+    output_dir = Path(output_dir)
+    model_path = output_dir / QUANTIZED_MODEL_FILE
+    if model_path.exists():
+        return model_path
+
+    # optimum is only needed for the one-off export
+    from optimum.onnxruntime import ORTModelForFeatureExtraction, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+
+    logger.info(f"Exporting {model_name} to INT8 ONNX in {output_dir}")
+    output_dir.mkdir(parents=True, exist_ok=True)
+    model = ORTModelForFeatureExtraction.from_pretrained(model_name, export=True)
+    model.save_pretrained(output_dir)
+    AutoTokenizer.from_pretrained(model_name).save_pretrained(output_dir)
+
+    quantizer = ORTQuantizer.from_pretrained(model)
+    qconfig = AutoQuantizationConfig.avx512_vnni(is_static=False, per_channel=False)
+    quantizer.quantize(save_dir=output_dir, quantization_config=qconfig)
+    return model_path
+
+
+def create_session(model_path):
+    so = ort.SessionOptions()
+    # Constant folding plus GELU / LayerNorm / MatMul+Add fusions
+    so.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    so.intra_op_num_threads = max(1, (os.cpu_count() or 1) // 2)
+    so.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+    session = ort.InferenceSession(
+        str(model_path),
+        sess_options=so,
+        providers=["CPUExecutionProvider"]
+    )
+    logger.info(
+        f"ONNX Runtime session on {ort.get_device()} "
+        f"with {so.intra_op_num_threads} intra-op threads"
+    )
+    return session
+
+
+# ========== EMBEDDING MODEL ==========
+class OnnxBGEEmbedding(BaseEmbedding):
+    """BGE sentence embeddings served from an INT8-quantized ONNX Runtime session."""
+
+    query_instruction: str = Field(
+        default=BGE_QUERY_INSTRUCTION,
+        description="Prefix added to queries (not documents) before embedding"
+    )
+
+    _session: ort.InferenceSession = PrivateAttr()
+    _tokenizer = PrivateAttr()
+    _input_names: set = PrivateAttr()
+
+    def __init__(self, model_name=DEFAULT_MODEL_NAME, model_dir=DEFAULT_MODEL_DIR, **kwargs):
+        super().__init__(model_name=model_name, **kwargs)
+        model_path = export_quantized_model(model_name, model_dir)
+        self._session = create_session(model_path)
+        self._tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        self._input_names = {i.name for i in self._session.get_inputs()}
+
+    @classmethod
+    def class_name(cls):
+        return "OnnxBGEEmbedding"
+
+    def _embed(self, texts):
+        inputs = self._tokenizer(texts, padding=True, truncation=True, return_tensors="np")
+        feeds = {name: arr for name, arr in inputs.items() if name in self._input_names}
+        token_embeddings = self._session.run(None, feeds)[0]
+
+        # BGE is CLS-pooled: take the [CLS] token, then L2-normalize
+        pooled = token_embeddings[:, 0]
+        norms = np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+        return pooled / norms
+
+    def _get_query_embedding(self, query):
+        return self._embed([self.query_instruction + query])[0].tolist()
+
+    async def _aget_query_embedding(self, query):
+        return self._get_query_embedding(query)
+
+    def _get_text_embedding(self, text):
+        return self._embed([text])[0].tolist()
+
+    def _get_text_embeddings(self, texts):
+        # One padded tokenizer call and one forward pass for the whole batch
+        return self._embed(list(texts)).tolist()
@@ -0,0 +1,44 @@
+import requests
+from llama_index.core.bridge.pydantic import Field, PrivateAttr
+from llama_index.core.embeddings import BaseEmbedding
+
+from onnx_embedding import BGE_QUERY_INSTRUCTION
+
+
+class RemoteEmbedding(BaseEmbedding):
+    """Embeddings fetched from the shared embed_server.py sidecar."""
+
+    url: str = Field(description="URL of the embed server's /embed endpoint")
+    timeout: float = Field(default=30.0, description="Request timeout in seconds")
+    query_instruction: str = Field(
+        default=BGE_QUERY_INSTRUCTION,
+        description="Prefix added to queries (not documents) before embedding"
+    )
+
+    _http: requests.Session = PrivateAttr()
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._http = requests.Session()
+
+    @classmethod
+    def class_name(cls):
+        return "RemoteEmbedding"
+
+    def _post(self, texts):
+        response = self._http.post(self.url, json={"texts": texts}, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()["embeddings"]
+
+    def _get_query_embedding(self, query):
+        # The server embeds everything as documents, so add the query instruction here
+        return self._post([self.query_instruction + query])[0]
+
+    async def _aget_query_embedding(self, query):
+        return self._get_query_embedding(query)
+
+    def _get_text_embedding(self, text):
+        return self._post([text])[0]
+
+    def _get_text_embeddings(self, texts):
+        return self._post(list(texts))
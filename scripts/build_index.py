@@ -0,0 +1,29 @@
+"""Pre-compute the knowledge-base embeddings shipped with the app.
+
+Writes health_index/vectors.npy and health_index/texts.json so the app can
+build its FAISS index at startup without running the encoder. Commit both
+files whenever HEALTH_DOCUMENTS changes.
+
+Usage (from the repository root):
+    python scripts/build_index.py
+"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from knowledge_base import HEALTH_DOCUMENTS, FAISS_FILE, embed_documents, save_vectors
+from onnx_embedding import OnnxBGEEmbedding
+
+
+def main():
+    embed_model = OnnxBGEEmbedding()
+    vectors = embed_documents(embed_model, HEALTH_DOCUMENTS)
+    save_vectors(vectors, HEALTH_DOCUMENTS)
+    # Drop any stale FAISS index so the app rebuilds it from the new vectors
+    FAISS_FILE.unlink(missing_ok=True)
+    print(f"Saved {vectors.shape[0]} x {vectors.shape[1]} embeddings ({vectors.dtype})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("numba")
+pytest.importorskip("faiss")
+pytest.importorskip("streamlit")
+
+import app
+
+HEIGHT = 200  # BMI = weight / 4
+
+# Fractional weights whose BMI straddles the 18.5, 25 and 30 band limits
+WEIGHTS = [
+    round(limit * 4 + step * 0.05, 2)
+    for limit in (18.5, 25, 30)
+    for step in range(-12, 13)
+]
+
+
+def baseline(weight):
+    bmi = round(weight / ((HEIGHT / 100) ** 2), 1)
+    if bmi < 18.5:
+        return bmi, "Underweight"
+    elif 18.5 <= bmi < 25:
+        return bmi, "Normal weight"
+    elif 25 <= bmi < 30:
+        return bmi, "Overweight"
+    return bmi, "Obese"
+
+
+@pytest.mark.parametrize("weight", WEIGHTS)
+def test_analyze_health_matches_python_rounding(weight):
+    result = app.analyze_health(30, weight, HEIGHT, "120/80", 100, 180)
+    assert (result["bmi"], result["conditions"][0]) == baseline(weight)
+
+
+def test_analyze_health_batch_agrees_with_analyze_health():
+    rows = np.array([[weight, HEIGHT, 150, 80, 130, 210] for weight in WEIGHTS])
+    bmis, masks = app.analyze_health_batch(rows)
+
+    for weight, bmi, mask in zip(WEIGHTS, bmis, masks):
+        result = app.analyze_health(30, weight, HEIGHT, "150/80", 130, 210)
+        assert bmi == result["bmi"]
+        assert app.conditions_from_mask(mask) == result["conditions"]